@@ -0,0 +1,77 @@
+from array import array
+from bisect import bisect_left, insort
+
+# Bin packing kernels. They only work on plain sizes and capacities
+# (no Package / StorageBin objects), so the hot loops stay tight.
+
+
+# best fit decreasing: biggest package first, into the bin with the
+# smallest remaining space that still fits. used is updated in place.
+# returns the bin index for every package (-1 = no bin)
+def bfd_assign(sizes, caps, used):
+    assign = array("i", [-1]) * len(sizes)
+    if not sizes:
+        return assign
+
+    order = sorted(range(len(sizes)), key=sizes.__getitem__, reverse=True)
+    # biggest first, so this stays the smallest package left
+    smallest = sizes[order[-1]]
+
+    # sorted (remaining_space, bin) of bins that can still take something
+    free = []
+    for b in range(len(caps)):
+        space = caps[b] - used[b]
+        if space > 0 and space >= smallest:
+            free.append((space, b))
+    free.sort()
+
+    for i in order:
+        size = sizes[i]
+        pos = bisect_left(free, (size, -1))
+        if pos == len(free):
+            continue
+
+        space, b = free.pop(pos)
+        used[b] += size
+        assign[i] = b
+        # bins too small for every package left are done
+        space -= size
+        if space > 0 and space >= smallest:
+            insort(free, (space, b))
+
+    return assign
+
+
+# 0/1 knapsack: subset with the largest total size <= cap
+# returns a mask, mask[i] is True if package i is chosen
+def knapsack_subset(sizes, cap):
+    mask = [False] * len(sizes)
+    if cap <= 0:
+        return mask
+
+    # reach[s] = some subset sums to s
+    reach = bytearray(cap+1)
+    reach[0] = 1
+    # take[i][s] = package i was added to first reach s
+    take = [bytearray(cap+1) for _ in sizes]
+
+    for i, size in enumerate(sizes):
+        # go downwards so each package is used at most once
+        for s in range(cap, size-1, -1):
+            if reach[s-size] and not reach[s]:
+                reach[s] = 1
+                take[i][s] = 1
+
+    best = cap
+    while best > 0 and not reach[best]:
+        best -= 1
+
+    # walk back through take to rebuild the subset
+    s = best
+    for i in range(len(sizes)-1, -1, -1):
+        if s == 0:
+            break
+        if take[i][s]:
+            mask[i] = True
+            s -= sizes[i]
+    return mask
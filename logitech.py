@@ -1,9 +1,57 @@
+import logging
 import sqlite3
+import time
+from array import array
+from bisect import bisect_left, insort
 from collections import deque
 from datetime import datetime
+from itertools import islice
+
+from bin_packing import bfd_assign, knapsack_subset
+
+log = logging.getLogger(__name__)
+
+# shipment_logs schema, also used to rebuild the table when migrating
+CREATE_LOGS_SQL = """
+    CREATE TABLE IF NOT EXISTS shipment_logs (
+        tracking_id TEXT,
+        bin_id INTEGER,
+        timestamp INTEGER,
+        status TEXT
+    );
+"""
+
+# SQL used on write paths, built once at import
+INSERT_LOG_SQL = "INSERT INTO shipment_logs VALUES (?, ?, ?, ?)"
+INSERT_BIN_SQL = "INSERT INTO bin_configuration VALUES (?, ?, ?)"
+
+# flush buffered logs once this many rows are waiting
+LOG_FLUSH_SIZE = 500
+
+# bin space is kept in array("i") columns, sizes must fit in them
+MAX_PACKAGE_SIZE = 2**31 - 1
+
+
+# old log timestamp (ISO string, epoch text or int) -> epoch seconds,
+# None if it can't be read
+def to_epoch(ts):
+    if ts is None or isinstance(ts, int):
+        return ts
+    try:
+        return int(ts)
+    except (TypeError, ValueError):
+        pass
+    try:
+        # naive ISO time was written with datetime.now(), i.e. local time
+        return int(datetime.fromisoformat(ts).timestamp())
+    except (TypeError, ValueError):
+        return None
+
 
 # Base class for any storage (bin/truck)
 class StorageUnit:
+    __slots__ = ("capacity", "used_space")
+
     def __init__(self, capacity):
         self.capacity = capacity
         self.used_space = 0
@@ -24,21 +72,21 @@ class StorageUnit:
 
 # Storage bin class
 class StorageBin(StorageUnit):
+    __slots__ = ("bin_id", "location_code")
+
     def __init__(self, bin_id, capacity, location_code):
         super().__init__(capacity)
         self.bin_id = bin_id
         self.location_code = location_code
 
-    # sort bins by capacity
-    def __lt__(self, other):
-        return self.capacity < other.capacity
-
     def __repr__(self):
         return f"Bin({self.bin_id}, cap={self.capacity}, used={self.used_space})"
 
 
 # Truck for loading packages
 class Truck(StorageUnit):
+    __slots__ = ("truck_id",)
+
     def __init__(self, truck_id, capacity):
         super().__init__(capacity)
         self.truck_id = truck_id
@@ -49,7 +97,13 @@ class Truck(StorageUnit):
 
 # Package info
 class Package:
+    __slots__ = ("tracking_id", "size", "destination")
+
     def __init__(self, tracking_id, size, destination):
+        # bool is an int subclass, but never a real size
+        if (not isinstance(size, int) or isinstance(size, bool)
+                or not 0 <= size <= MAX_PACKAGE_SIZE):
+            raise ValueError("Package size must be an int in 0..MAX_PACKAGE_SIZE")
         self.tracking_id = tracking_id
         self.size = size
         self.destination = destination
@@ -72,16 +126,29 @@ class WarehouseController:
         if WarehouseController._instance is not None:
             raise Exception("Use get_instance(), not direct create")
 
-        # sorted bin list
-        self.bin_inventory = []
+        # bins as parallel arrays, sorted by capacity
+        self.bin_ids = array("i")
+        self.bin_caps = array("i")
+        self.bin_used = array("i")
+        self.bin_locations = []
+        # sorted (remaining_space, bin index) of bins with free space
+        self._bin_free = []
         # incoming packages FIFO
         self.queue_incoming = deque()
-        # stack for truck loading (LIFO)
+        # stack for truck loading (LIFO) of (truck, size, tracking_id)
         self.stack_loading = []
+        # log rows waiting to be written in one batch
+        self._log_buffer = []
 
         # DB
-        self.db_connection = sqlite3.connect("logitech.db")
+        # autocommit mode: we open transactions ourselves with BEGIN
+        self.db_connection = sqlite3.connect("logitech.db", isolation_level=None)
         self.db_cursor = self.db_connection.cursor()
+        # WAL + relaxed sync: one append per commit instead of full fsync
+        self.db_cursor.execute("PRAGMA journal_mode=WAL")
+        self.db_cursor.execute("PRAGMA synchronous=NORMAL")
+        self.db_cursor.execute("PRAGMA temp_store=MEMORY")
+        self.db_cursor.execute("PRAGMA cache_size=-65536")
 
         self.setup_database()
         self.load_bins_from_db()
@@ -95,147 +162,261 @@ class WarehouseController:
                 location_code TEXT
             );
         """)
-        self.db_cursor.execute("""
-            CREATE TABLE IF NOT EXISTS shipment_logs (
-                tracking_id TEXT,
-                bin_id INTEGER,
-                timestamp TEXT,
-                status TEXT
-            );
-        """)
-        self.db_connection.commit()
+        self.db_cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_bin_cap ON bin_configuration(capacity)"
+        )
+        self.db_cursor.execute(CREATE_LOGS_SQL)
+        self.migrate_log_timestamps()
+
+    # older dbs have timestamp TEXT with ISO strings, convert to epoch
+    def migrate_log_timestamps(self):
+        self.db_cursor.execute("PRAGMA table_info(shipment_logs)")
+        col_types = {r[1]: r[2].upper() for r in self.db_cursor.fetchall()}
+        if col_types.get("timestamp") == "INTEGER":
+            return
 
-    def load_bins_from_db(self):
-        # if empty table insert demo bins once
-        self.db_cursor.execute("SELECT COUNT(*) FROM bin_configuration")
-        if self.db_cursor.fetchone()[0] == 0:
-            demo = [
-                (1, 10, "A1"),
-                (2, 20, "A2"),
-                (3, 50, "B1"),
-                (4, 100, "B2")
+        log.info("Migrating shipment_logs.timestamp to INTEGER")
+        try:
+            self.db_cursor.execute("BEGIN IMMEDIATE")
+            self.db_cursor.execute("SELECT * FROM shipment_logs")
+            rows = [
+                (t, b, to_epoch(ts), s)
+                for t, b, ts, s in self.db_cursor.fetchall()
             ]
-            self.db_cursor.executemany(
-                "INSERT INTO bin_configuration VALUES (?, ?, ?)",
-                demo
-            )
+            self.db_cursor.execute("DROP TABLE shipment_logs")
+            self.db_cursor.execute(CREATE_LOGS_SQL)
+            self.db_cursor.executemany(INSERT_LOG_SQL, rows)
             self.db_connection.commit()
+        except sqlite3.Error as e:
+            log.error("Error: %s", e)
+            self.db_connection.rollback()
 
-        # load bins from database
-        self.db_cursor.execute("SELECT * FROM bin_configuration")
-        rows = self.db_cursor.fetchall()
-        self.bin_inventory = [StorageBin(r[0], r[1], r[2]) for r in rows]
-        self.bin_inventory.sort(key=lambda b: b.capacity)
+    def load_bins_from_db(self):
+        # if empty table insert demo bins once; check under the write
+        # lock so two processes starting together can't both seed
+        try:
+            self.db_cursor.execute("BEGIN IMMEDIATE")
+            self.db_cursor.execute("SELECT EXISTS(SELECT 1 FROM bin_configuration)")
+            if not self.db_cursor.fetchone()[0]:
+                demo = [
+                    (1, 10, "A1"),
+                    (2, 20, "A2"),
+                    (3, 50, "B1"),
+                    (4, 100, "B2")
+                ]
+                self.db_cursor.executemany(INSERT_BIN_SQL, demo)
+            self.db_connection.commit()
+        except sqlite3.Error as e:
+            log.error("Error: %s", e)
+            self.db_connection.rollback()
 
-    def log_action(self, tracking_id, bin_id, status):
-        ts = datetime.now().isoformat(timespec="seconds")
+        # load bins from database, sqlite does the sorting
         self.db_cursor.execute(
-            "INSERT INTO shipment_logs VALUES (?, ?, ?, ?)",
-            (tracking_id, bin_id, ts, status)
+            "SELECT bin_id, capacity, location_code FROM bin_configuration "
+            "ORDER BY capacity ASC"
+        )
+        rows = self.db_cursor.fetchall()
+        self.bin_ids = array("i", [r[0] for r in rows])
+        self.bin_caps = array("i", [r[1] for r in rows])
+        self.bin_used = array("i", [0]) * len(rows)
+        self.bin_locations = [r[2] for r in rows]
+        self._rebuild_bin_free()
+
+    # fresh sorted free list from bin_caps / bin_used
+    def _rebuild_bin_free(self):
+        self._bin_free = sorted(
+            (cap - used, i)
+            for i, (cap, used) in enumerate(zip(self.bin_caps, self.bin_used))
+            if cap > used
         )
 
+    # public API: StorageBin snapshot of one bin for callers,
+    # built on demand so it stays out of the hot paths
+    def get_bin(self, idx):
+        bin_obj = StorageBin(
+            self.bin_ids[idx], self.bin_caps[idx], self.bin_locations[idx]
+        )
+        bin_obj.used_space = self.bin_used[idx]
+        return bin_obj
+
+    # same check as StorageUnit.occupy_space, on the arrays;
+    # then move the bin to its new spot in the free list
+    def occupy_bin(self, idx, amount):
+        space = self.bin_caps[idx] - self.bin_used[idx]
+        if amount > space:
+            raise ValueError("Not enough space")
+        self.bin_used[idx] += amount
+
+        if amount:
+            del self._bin_free[bisect_left(self._bin_free, (space, idx))]
+            if space > amount:
+                insort(self._bin_free, (space - amount, idx))
+
+    def log_action(self, tracking_id, bin_id, status):
+        # only buffer here, flush_logs() writes the whole batch
+        # unix epoch seconds, much cheaper than formatting a datetime
+        ts = int(time.time())
+        self._log_buffer.append((tracking_id, bin_id, ts, status))
+
+    # write buffered logs in a single transaction
+    def flush_logs(self):
+        # nothing buffered -> no transaction at all
+        if not self._log_buffer:
+            return
+        try:
+            self.db_cursor.execute("BEGIN")
+            self.db_cursor.executemany(INSERT_LOG_SQL, self._log_buffer)
+            self.db_connection.commit()
+        except sqlite3.Error as e:
+            log.error("Error: %s", e)
+            self.db_connection.rollback()
+        self._log_buffer.clear()
+
     # add to incoming queue
     def add_package(self, package):
-        print("Ingest:", package)
+        log.debug("Ingest: %r", package)
         self.queue_incoming.append(package)
 
     def process_package(self):
         if not self.queue_incoming:
-            print("No packages left")
+            log.info("No packages left")
             return
 
         pkg = self.queue_incoming.popleft()
-        print("Processing:", pkg)
+        log.debug("Processing: %r", pkg)
 
         try:
             idx = self.find_best_fit_bin(pkg.size)
             if idx == -1:
-                print("No bin found for", pkg)
+                log.warning("No bin found for %r", pkg)
                 self.log_action(pkg.tracking_id, None, "NO_BIN")
             else:
-                bin_obj = self.bin_inventory[idx]
-                bin_obj.occupy_space(pkg.size)
-                print("Placed in", bin_obj)
-                self.log_action(pkg.tracking_id, bin_obj.bin_id, "BIN_ASSIGNED")
+                self.occupy_bin(idx, pkg.size)
+                log.debug("Placed in bin_id=%d", self.bin_ids[idx])
+                self.log_action(pkg.tracking_id, self.bin_ids[idx], "BIN_ASSIGNED")
 
-            self.db_connection.commit()
+        except ValueError as e:
+            log.error("Error: %s", e)
 
-        except Exception as e:
-            print("Error:", e)
-            self.db_connection.rollback()
+        # end of batch (queue drained) or buffer big enough
+        if not self.queue_incoming or len(self._log_buffer) >= LOG_FLUSH_SIZE:
+            self.flush_logs()
 
-    # binary search on sorted bin capacities
-    def find_best_fit_bin(self, pkg_size):
-        low, high = 0, len(self.bin_inventory)-1
-        ans = -1
-        while low <= high:
-            mid = (low + high)//2
-            if self.bin_inventory[mid].capacity >= pkg_size:
-                ans = mid
-                high = mid - 1
-            else:
-                low = mid + 1
-        return ans
+    # drain the whole queue at once, biggest packages first (BFD)
+    def process_batch(self):
+        self.process_n(len(self.queue_incoming))
 
-    # recursive try, include or skip package
-    def try_load(self, pkgs, i, space, chosen):
-        if i == len(pkgs):
-            return len(chosen) > 0 and space >= 0
+    # process the next n packages as one batch
+    def process_n(self, n):
+        if not self.queue_incoming:
+            log.info("No packages left")
+            return
+        if n <= 0:
+            return
 
-        pkg = pkgs[i]
+        pkgs = list(islice(self.queue_incoming, n))
+        log.info("Processing batch of %d", len(pkgs))
+
+        # place on a copy first, so an error leaves bins and queue as they were
+        sizes = array("i", [p.size for p in pkgs])
+        used = array("i", self.bin_used)
+        # fills used in place, no per-package occupy_bin() calls;
+        # bfd_assign only picks bins with room, so no capacity check here
+        assign = bfd_assign(sizes, self.bin_caps, used)
+
+        # placement worked, now take the batch off the queue
+        self.bin_used = used
+        self._rebuild_bin_free()
+        if n >= len(self.queue_incoming):
+            # taking everything: swap in a fresh empty queue
+            self.queue_incoming = deque()
+        else:
+            for _ in range(n):
+                self.queue_incoming.popleft()
+
+        for pkg, idx in zip(pkgs, assign):
+            if idx == -1:
+                log.warning("No bin found for %r", pkg)
+                self.log_action(pkg.tracking_id, None, "NO_BIN")
+            else:
+                log.debug("Placed %s in bin_id=%d", pkg.tracking_id, self.bin_ids[idx])
+                self.log_action(pkg.tracking_id, self.bin_ids[idx], "BIN_ASSIGNED")
+
+        # one transaction for the whole batch
+        self.flush_logs()
 
-        if pkg.size <= space:
-            chosen.append(pkg)
-            if self.try_load(pkgs, i+1, space - pkg.size, chosen):
-                return True
-            chosen.pop()
+    # best fit: bin with the smallest remaining space >= pkg_size
+    def find_best_fit_bin(self, pkg_size):
+        pos = bisect_left(self._bin_free, (pkg_size, -1))
+        return self._bin_free[pos][1] if pos < len(self._bin_free) else -1
 
-        return self.try_load(pkgs, i+1, space, chosen)
+    # 0/1 knapsack: pick subset with the largest total size <= cap
+    def pack(self, pkgs, cap):
+        mask = knapsack_subset([p.size for p in pkgs], cap)
+        return [p for p, keep in zip(pkgs, mask) if keep]
 
-    # load fragile packages using backtracking
+    # load fragile packages using knapsack dp
     def load_fragile(self, truck, fragile_pkgs):
-        chosen = []
-        if not self.try_load(fragile_pkgs, 0, truck.remaining_space(), chosen):
-            print("Not possible in", truck.truck_id)
+        chosen = self.pack(fragile_pkgs, truck.remaining_space())
+        if not chosen:
+            log.info("Not possible in %s", truck.truck_id)
             return []
 
-        print("Loading:", chosen)
+        log.info("Loading: %r", chosen)
 
-        try:
-            for p in chosen:
-                self.stack_loading.append((truck, p))
-                truck.occupy_space(p.size)
-                self.log_action(p.tracking_id, None, "TRUCK_LOADED")
-            self.db_connection.commit()
-        except:
-            self.db_connection.rollback()
+        # pack() only picks packages that fit, so occupy_space can't fail
+        for p in chosen:
+            truck.occupy_space(p.size)
+            self.stack_loading.append((truck, p.size, p.tracking_id))
+            self.log_action(p.tracking_id, None, "TRUCK_LOADED")
+        self.flush_logs()
 
         return chosen
 
     # undo last loads
     def rollback(self, count=None):
-        print("Rollback", count if count else "all")
-        try:
-            removed = 0
-            while self.stack_loading and (count is None or removed < count):
-                truck, pkg = self.stack_loading.pop()
-                truck.free_space(pkg.size)
-                self.log_action(pkg.tracking_id, None, "ROLLBACK")
-                removed += 1
-            self.db_connection.commit()
-        except:
-            self.db_connection.rollback()
+        log.info("Rollback %s", count if count else "all")
+        # add up the space per truck, then one free_space() call each
+        freed = {}
+        removed = 0
+        while self.stack_loading and (count is None or removed < count):
+            truck, size, tracking_id = self.stack_loading.pop()
+            freed[truck] = freed.get(truck, 0) + size
+            self.log_action(tracking_id, None, "ROLLBACK")
+            removed += 1
+
+        for truck, size in freed.items():
+            truck.free_space(size)
+        self.flush_logs()
 
     def show_logs(self):
+        self.flush_logs()
         print("\nLogs:")
         self.db_cursor.execute("SELECT * FROM shipment_logs")
         for row in self.db_cursor.fetchall():
             print(row)
         print()
 
+    # write pending logs and close the db, get_instance() makes a new one
+    def close(self):
+        if self.db_connection is None:
+            return
+        self.flush_logs()
+        self.db_connection.close()
+        self.db_connection = None
+        if WarehouseController._instance is self:
+            WarehouseController._instance = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
 
 # Main for demo
 def main():
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s")
     w = WarehouseController.get_instance()
 
     p1 = Package("P001", 5, "Delhi")
@@ -256,6 +437,7 @@ def main():
     w.load_fragile(truck, fragile)
     w.rollback(1)
     w.show_logs()
+    w.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,77 @@
+import random
+import unittest
+from array import array
+from itertools import combinations
+
+from bin_packing import bfd_assign, knapsack_subset
+
+
+# slow reference: same order, scan every bin for the best fit
+def brute_bfd(sizes, caps, used):
+    used = list(used)
+    assign = [-1] * len(sizes)
+    order = sorted(range(len(sizes)), key=sizes.__getitem__, reverse=True)
+    for i in order:
+        fits = [
+            (caps[b] - used[b], b)
+            for b in range(len(caps))
+            if caps[b] - used[b] > 0 and caps[b] - used[b] >= sizes[i]
+        ]
+        if fits:
+            b = min(fits)[1]
+            used[b] += sizes[i]
+            assign[i] = b
+    return assign, used
+
+
+# slow reference: try every subset
+def brute_best_total(sizes, cap):
+    best = 0
+    for k in range(1, len(sizes)+1):
+        for combo in combinations(sizes, k):
+            if best < sum(combo) <= cap:
+                best = sum(combo)
+    return best
+
+
+class BfdAssignTest(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(1)
+        for _ in range(500):
+            caps = array("i", [rng.randint(0, 40) for _ in range(rng.randint(0, 6))])
+            used = array("i", [rng.randint(0, c) for c in caps])
+            sizes = array("i", [rng.randint(1, 30) for _ in range(rng.randint(0, 10))])
+
+            expected, expected_used = brute_bfd(sizes, caps, used)
+            assign = bfd_assign(sizes, caps, used)
+
+            self.assertEqual(list(assign), expected)
+            self.assertEqual(list(used), expected_used)
+
+    def test_no_bin(self):
+        used = array("i", [0, 0])
+        assign = bfd_assign(array("i", [50, 5]), array("i", [10, 20]), used)
+        self.assertEqual(list(assign), [-1, 0])
+        self.assertEqual(list(used), [5, 0])
+
+
+class KnapsackSubsetTest(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(2)
+        for _ in range(500):
+            sizes = [rng.randint(1, 30) for _ in range(rng.randint(0, 8))]
+            cap = rng.randint(-5, 60)
+
+            mask = knapsack_subset(sizes, cap)
+            total = sum(s for s, keep in zip(sizes, mask) if keep)
+
+            self.assertEqual(len(mask), len(sizes))
+            self.assertEqual(total, brute_best_total(sizes, cap))
+
+    def test_nothing_fits(self):
+        self.assertEqual(knapsack_subset([7, 9], 5), [False, False])
+        self.assertEqual(knapsack_subset([3], 0), [False])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,203 @@
+import os
+import random
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from logitech import Package, WarehouseController
+
+BINS = [
+    (1, 10, "A1"),
+    (2, 7, "A2"),
+    (3, 7, "B1"),
+    (4, 3, "B2"),
+    (5, 20, "C1"),
+]
+
+
+# controller on a fresh logitech.db in a temp dir
+class WarehouseTestCase(unittest.TestCase):
+    bins = BINS
+
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+        db = sqlite3.connect("logitech.db")
+        self.seed_db(db)
+        db.commit()
+        db.close()
+
+        self.w = WarehouseController.get_instance()
+
+    # tables that exist before the controller opens the db
+    def seed_db(self, db):
+        db.execute("""
+            CREATE TABLE bin_configuration (
+                bin_id INTEGER PRIMARY KEY,
+                capacity INTEGER,
+                location_code TEXT
+            );
+        """)
+        db.executemany("INSERT INTO bin_configuration VALUES (?, ?, ?)", self.bins)
+
+    def tearDown(self):
+        self.w.close()
+        os.chdir(self.old_cwd)
+        self.tmp.cleanup()
+
+
+def remaining(w):
+    return [cap - used for cap, used in zip(w.bin_caps, w.bin_used)]
+
+
+# slow reference: scan every bin with room for the tightest fit
+def brute_best_fit(space, size):
+    fits = [(s, i) for i, s in enumerate(space) if s > 0 and s >= size]
+    return min(fits)[1] if fits else -1
+
+
+class BestFitTest(WarehouseTestCase):
+    def check(self, sizes):
+        for n, size in enumerate(sizes):
+            before = remaining(self.w)
+            expected = brute_best_fit(before, size)
+
+            self.w.add_package(Package("P%d" % n, size, "X"))
+            self.w.process_package()
+
+            after = remaining(self.w)
+            if expected != -1:
+                before[expected] -= size
+            self.assertEqual(after, before)
+            # free list matches the bins that still have room
+            self.assertEqual(
+                self.w._bin_free,
+                sorted((s, i) for i, s in enumerate(after) if s > 0),
+            )
+
+    def test_exact_fill_and_zero_size(self):
+        # 3 fills B2 exactly, 0 goes to the tightest bin with room,
+        # 7 + 7 fill A2 and B1, 25 fits nowhere
+        self.check([3, 0, 7, 7, 0, 10, 25, 20, 0])
+
+    def test_random_against_brute_force(self):
+        rng = random.Random(3)
+        self.check([rng.randint(0, 12) for _ in range(200)])
+
+
+class ProcessNTest(WarehouseTestCase):
+    sizes = [5, 12, 8, 3]
+
+    def setUp(self):
+        super().setUp()
+        for n, size in enumerate(self.sizes):
+            self.w.add_package(Package("P%d" % n, size, "X"))
+
+    def queued(self):
+        return [p.tracking_id for p in self.w.queue_incoming]
+
+    def placed(self):
+        return sum(self.w.bin_used)
+
+    def test_fewer_than_queued(self):
+        self.w.process_n(2)
+        self.assertEqual(self.queued(), ["P2", "P3"])
+        self.assertEqual(self.placed(), 5 + 12)
+
+    def test_exactly_queued(self):
+        self.w.process_n(4)
+        self.assertEqual(self.queued(), [])
+        self.assertEqual(self.placed(), sum(self.sizes))
+
+    def test_more_than_queued(self):
+        self.w.process_n(10)
+        self.assertEqual(self.queued(), [])
+        self.assertEqual(self.placed(), sum(self.sizes))
+
+    def test_error_leaves_queue_and_bins(self):
+        free = list(self.w._bin_free)
+        with mock.patch("logitech.bfd_assign", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.w.process_n(3)
+
+        self.assertEqual(self.queued(), ["P0", "P1", "P2", "P3"])
+        self.assertEqual(self.placed(), 0)
+        self.assertEqual(self.w._bin_free, free)
+
+    def test_error_after_partial_placement(self):
+        # kernel fills some bins, then fails
+        def fail_midway(sizes, caps, used):
+            used[0] = caps[0]
+            raise RuntimeError
+
+        with mock.patch("logitech.bfd_assign", side_effect=fail_midway):
+            with self.assertRaises(RuntimeError):
+                self.w.process_n(4)
+
+        self.assertEqual(self.queued(), ["P0", "P1", "P2", "P3"])
+        self.assertEqual(self.placed(), 0)
+
+
+class TimestampMigrationTest(WarehouseTestCase):
+    iso = "2024-05-01T10:20:30"
+
+    # shipment_logs as created by older versions, timestamp TEXT
+    def seed_db(self, db):
+        super().seed_db(db)
+        db.execute("""
+            CREATE TABLE shipment_logs (
+                tracking_id TEXT,
+                bin_id INTEGER,
+                timestamp TEXT,
+                status TEXT
+            );
+        """)
+        db.executemany("INSERT INTO shipment_logs VALUES (?, ?, ?, ?)", [
+            ("P1", 1, self.iso, "BIN_ASSIGNED"),
+            ("P2", 2, "1792057942", "BIN_ASSIGNED"),
+            ("P3", None, "garbage", "NO_BIN"),
+            ("P4", None, None, "NO_BIN"),
+        ])
+
+    def test_text_column_is_rebuilt_as_integer(self):
+        self.w.add_package(Package("P5", 3, "X"))
+        self.w.process_package()
+        self.w.close()
+
+        db = sqlite3.connect("logitech.db")
+        col_types = {
+            r[1]: r[2] for r in db.execute("PRAGMA table_info(shipment_logs)")
+        }
+        rows = db.execute(
+            "SELECT tracking_id, timestamp, typeof(timestamp) FROM shipment_logs"
+        ).fetchall()
+        db.close()
+
+        self.assertEqual(col_types["timestamp"], "INTEGER")
+        self.assertEqual([r[0] for r in rows], ["P1", "P2", "P3", "P4", "P5"])
+        self.assertEqual(rows[0][1], int(datetime.fromisoformat(self.iso).timestamp()))
+        self.assertEqual(rows[1][1], 1792057942)
+        # unreadable and missing timestamps become NULL
+        self.assertEqual(rows[2][2], "null")
+        self.assertEqual(rows[3][2], "null")
+        # new rows are stored as real integers
+        self.assertEqual(rows[4][2], "integer")
+
+
+class PackageTest(unittest.TestCase):
+    def test_rejects_sizes_bins_cannot_hold(self):
+        for size in (2.5, "3", -1, True, 2**31):
+            with self.assertRaises(ValueError):
+                Package("F", size, "X")
+
+    def test_accepts_int_sizes(self):
+        self.assertEqual(Package("P", 0, "X").size, 0)
+        self.assertEqual(Package("P", 2**31 - 1, "X").size, 2**31 - 1)
+
+
+if __name__ == "__main__":
+    unittest.main()